@@ -0,0 +1,19 @@
+"""
+Gunicorn Configuration
+
+Runs the service on gevent workers so that requests waiting on PostgreSQL
+do not block each other. Settings can be overridden on the command line.
+"""
+import os
+import multiprocessing
+
+worker_class = "gevent"
+workers = int(os.getenv("GUNICORN_WORKERS", str(multiprocessing.cpu_count())))
+worker_connections = int(os.getenv("GUNICORN_WORKER_CONNECTIONS", "1000"))
+
+
+def post_fork(server, worker):  # pylint: disable=unused-argument
+    """Makes psycopg2 cooperate with the gevent event loop"""
+    from psycogreen.gevent import patch_psycopg  # pylint: disable=import-outside-toplevel
+
+    patch_psycopg()
@@ -23,8 +23,11 @@ and SQL database
 """
 import sys
 from flask import Flask
+from flask_caching import Cache
+from flask_compress import Compress
 from service import config
 from service.common import log_handlers
+from service.common.json_provider import OrjsonProvider
 
 # NOTE: Do not change the order of this code
 # The Flask app must be created
@@ -36,6 +39,17 @@ app = Flask(__name__)  # pylint: disable=invalid-name
 # Load Configurations
 app.config.from_object(config)
 
+# Encode and decode JSON with orjson
+app.json = OrjsonProvider(app)
+app.json.compact = True
+app.json.sort_keys = False
+
+# Set up the response cache
+cache = Cache(app)
+
+# Compress large JSON responses
+Compress(app)
+
 # Dependencies require we import the routes AFTER the Flask app is created
 # pylint: disable=wrong-import-position, wrong-import-order, cyclic-import
 from service import routes, models        # noqa: F401, E402
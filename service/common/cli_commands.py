@@ -2,7 +2,8 @@
 Flask CLI Command Extensions
 """
 from service import app
-from service.models import db
+from service.models import db, Product
+from service.routes import serialize_product
 
 
 ######################################################################
@@ -12,9 +13,24 @@ from service.models import db
 @app.cli.command("db-create")
 def db_create():
     """
-    Recreates a local database. You probably should not use this on
-    production.
+    Recreates a local database, deleting all of its data. You probably
+    should not use this on production. To add new columns to an existing
+    database without losing data use flask db-upgrade.
     """
     db.drop_all()
     db.create_all()
     db.session.commit()
+    serialize_product.cache_clear()
+
+
+######################################################################
+# Command to upgrade existing tables in place
+# Usage: flask db-upgrade
+######################################################################
+@app.cli.command("db-upgrade")
+def db_upgrade():
+    """
+    Upgrades an existing database in place, keeping its data. This also
+    runs every time the service starts.
+    """
+    Product.upgrade_db()
@@ -3,6 +3,7 @@ Global Configuration for Application
 """
 import os
 import logging
+import multiprocessing
 
 # Get configuration from environment
 DATABASE_URI = os.getenv(
@@ -13,7 +14,46 @@ DATABASE_URI = os.getenv(
 # Configure SQLAlchemy
 SQLALCHEMY_DATABASE_URI = DATABASE_URI
 SQLALCHEMY_TRACK_MODIFICATIONS = False
-# SQLALCHEMY_POOL_SIZE = 2
+# Each gunicorn worker has its own pool, so the service can open up to
+# workers x (pool_size + max_overflow) connections. Split a total budget
+# that stays under PostgreSQL's default max_connections=100 between the
+# workers, which default to one per CPU as in gunicorn.conf.py. Every
+# worker keeps at least one connection, so running more workers than
+# DATABASE_MAX_CONNECTIONS exceeds the budget
+DATABASE_MAX_CONNECTIONS = int(os.getenv("DATABASE_MAX_CONNECTIONS", "80"))
+GUNICORN_WORKERS = int(os.getenv("GUNICORN_WORKERS", str(multiprocessing.cpu_count())))
+CONNECTIONS_PER_WORKER = max(1, DATABASE_MAX_CONNECTIONS // GUNICORN_WORKERS)
+DATABASE_POOL_SIZE = int(os.getenv("DATABASE_POOL_SIZE", str(max(1, CONNECTIONS_PER_WORKER // 3))))
+DATABASE_MAX_OVERFLOW = int(
+    os.getenv("DATABASE_MAX_OVERFLOW", str(max(0, CONNECTIONS_PER_WORKER - DATABASE_POOL_SIZE)))
+)
+
+# Keep warm connections per worker; LIFO reuses the most recently used one
+SQLALCHEMY_ENGINE_OPTIONS = {
+    "pool_size": DATABASE_POOL_SIZE,
+    "max_overflow": DATABASE_MAX_OVERFLOW,
+    "pool_recycle": 1800,
+    "pool_pre_ping": False,
+    "pool_use_lifo": True,
+}
+
+# Configure Flask-Caching
+# SimpleCache lives in each gunicorn worker and a write only retires the lists
+# cached by the worker that handled it, so other workers may serve a product list
+# that is up to CACHE_DEFAULT_TIMEOUT seconds stale. Set CACHE_TYPE=RedisCache
+# and CACHE_REDIS_URL to share one cache between workers.
+CACHE_TYPE = os.getenv("CACHE_TYPE", "SimpleCache")
+CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL")
+CACHE_DEFAULT_TIMEOUT = int(os.getenv("CACHE_DEFAULT_TIMEOUT", "30"))
+
+# Configure Flask-Compress
+COMPRESS_MIMETYPES = ["application/json"]
+COMPRESS_ALGORITHM = ["br", "gzip"]
+COMPRESS_LEVEL = 4
+COMPRESS_BR_LEVEL = 4
+COMPRESS_MIN_SIZE = 1024
+# Compressing a stream would buffer it
+COMPRESS_STREAMS = False
 
 # Secret for session management
 SECRET_KEY = os.getenv("SECRET_KEY", "sup3r-s3cr3t")
@@ -26,9 +26,11 @@ Attributes:
 name (string) - the name of the product
 description (string) - the description the product belongs to (i.e., dog, cat)
 available (boolean) - True for products that are available for adoption
+version (integer) - a random value drawn again each time the product is written
 
 """
 import logging
+import secrets
 from enum import Enum
 from decimal import Decimal
 from flask import Flask
@@ -37,7 +39,19 @@ from flask_sqlalchemy import SQLAlchemy
 logger = logging.getLogger("flask.app")
 
 # Create the SQLAlchemy object to be initialized later in init_db()
-db = SQLAlchemy()
+# Instances are not expired on commit so serializing a Product right after
+# create() or update() does not reload it from the database
+db = SQLAlchemy(session_options={"expire_on_commit": False})
+
+
+def new_version() -> int:
+    """Returns a random Product version that fits in an INTEGER column
+
+    Versions are random rather than counted so that a product which reuses
+    the id of a deleted one, or one created after the table is rebuilt,
+    never shares an ETag or cached response with it
+    """
+    return secrets.randbits(31)
 
 
 def init_db(app):
@@ -79,6 +93,8 @@ class Product(db.Model):
     category = db.Column(
         db.Enum(Category), nullable=False, server_default=(Category.UNKNOWN.name)
     )
+    # Added to existing databases by upgrade_db()
+    version = db.Column(db.Integer, nullable=False, default=new_version, server_default="1")
 
     ##################################################
     # INSTANCE METHODS
@@ -104,6 +120,7 @@ class Product(db.Model):
         logger.info("Saving %s", self.name)
         if not self.id:
             raise DataValidationError("Update called with empty ID field")
+        self.version = new_version()
         db.session.commit()
 
     def delete(self):
@@ -112,6 +129,36 @@ class Product(db.Model):
         db.session.delete(self)
         db.session.commit()
 
+    def replace(self) -> bool:
+        """
+        Overwrites the stored Product that has this id in a single UPDATE
+
+        :return: True if a Product was updated, False if none has this id
+        :rtype: bool
+
+        """
+        logger.info("Replacing %s", self.name)
+        if not self.id:
+            raise DataValidationError("Replace called with empty ID field")
+        version = new_version()
+        result = db.session.execute(
+            db.update(Product)
+            .where(Product.id == self.id)
+            .values(
+                name=self.name,
+                description=self.description,
+                price=self.price,
+                available=self.available,
+                category=self.category,
+                version=version,
+            )
+        )
+        db.session.commit()
+        if result.rowcount == 0:
+            return False
+        self.version = version
+        return True
+
     def serialize(self) -> dict:
         """Serializes a Product into a dictionary"""
         return {
@@ -168,6 +215,44 @@ class Product(db.Model):
         db.init_app(app)
         app.app_context().push()
         db.create_all()  # make our sqlalchemy tables
+        cls.upgrade_db()  # add columns that create_all() won't add
+
+    @classmethod
+    def upgrade_db(cls):
+        """Adds columns introduced after the product table was created
+
+        db.create_all() never alters an existing table, so databases that
+        predate the version column are upgraded in place here
+        """
+        columns = db.inspect(db.engine).get_columns(cls.__tablename__)
+        if "version" not in {column["name"] for column in columns}:
+            logger.info("Adding version column to %s", cls.__tablename__)
+            db.session.execute(
+                db.text(
+                    f"ALTER TABLE {cls.__tablename__} "
+                    "ADD COLUMN version INTEGER NOT NULL DEFAULT 1"
+                )
+            )
+            db.session.commit()
+
+    @classmethod
+    def bulk_create(cls, products: list) -> list:
+        """Creates many Products in a single transaction
+
+        :param products: the Products to add to the database
+        :type products: list
+
+        :return: the ids assigned to the new Products
+        :rtype: list
+
+        """
+        logger.info("Creating %d Products", len(products))
+        for product in products:
+            # id must be none to generate next primary key
+            product.id = None
+        db.session.add_all(products)
+        db.session.commit()
+        return [product.id for product in products]
 
     @classmethod
     def all(cls) -> list:
@@ -189,6 +274,38 @@ class Product(db.Model):
         logger.info("Processing lookup for id %s ...", product_id)
         return cls.query.get(product_id)
 
+    @classmethod
+    def delete_by_id(cls, product_id: int) -> bool:
+        """Removes a Product by it's ID in a single DELETE
+
+        :param product_id: the id of the Product to remove
+        :type product_id: int
+
+        :return: True if a Product was removed, False if none has this id
+        :rtype: bool
+
+        """
+        logger.info("Deleting id %s ...", product_id)
+        result = db.session.execute(db.delete(cls).where(cls.id == product_id))
+        db.session.commit()
+        return result.rowcount > 0
+
+    @classmethod
+    def find_version(cls, product_id: int):
+        """Finds the version of a Product by it's ID
+
+        :param product_id: the id of the Product to find
+        :type product_id: int
+
+        :return: the version of the Product, or None if not found
+        :rtype: int
+
+        """
+        logger.info("Processing version lookup for id %s ...", product_id)
+        return db.session.execute(
+            db.select(cls.version).where(cls.id == product_id)
+        ).scalar()
+
     @classmethod
     def find_by_name(cls, name: str) -> list:
         """Returns all Products with the given name
@@ -14,15 +14,33 @@
 # limitations under the License.
 ######################################################################
 
-# spell: ignore Rofrano jsonify restx dbname
+# spell: ignore Rofrano jsonify restx dbname orjson
 """
 Product Store Service with UI
 """
-from flask import jsonify, request, abort
+from functools import lru_cache
+from hashlib import md5
+from urllib.parse import urlencode
+from uuid import uuid4
+import orjson
+from flask import request, abort, stream_with_context
 from flask import url_for  # noqa: F401 pylint: disable=unused-import
-from service.models import Product, Category
+from flask.json.provider import DefaultJSONProvider
+from service.models import db, Product, Category
 from service.common import status  # HTTP Status Codes
-from . import app
+from . import app, cache
+
+logger = app.logger
+
+# Cache key holding the current generation of cached product lists
+PRODUCT_LIST_GENERATION_KEY = "product_list_generation"
+
+# Lookup tables for parsing query parameters
+_CATEGORY_BY_NAME = {category.name: category for category in Category}
+_BOOLEAN_BY_STRING = {
+    **{value: True for value in ("true", "t", "1", "yes")},
+    **{value: False for value in ("false", "f", "0", "no")},
+}
 
 
 ######################################################################
@@ -33,7 +51,7 @@ from . import app
 @app.route("/health")
 def healthcheck():
     """Let them know our heart is still beating"""
-    return jsonify(status=200, message="OK"), status.HTTP_200_OK
+    return json_response({"status": 200, "message": "OK"}, status.HTTP_200_OK)
 
 
 ######################################################################
@@ -52,19 +70,72 @@ def index():
 ######################################################################
 
 
-def check_content_type(content_type):
-    """Checks that the media type is correct"""
-    if "Content-Type" not in request.headers:
-        app.logger.error("No Content-Type specified.")
+def json_response(data, status_code=status.HTTP_200_OK, headers=None):
+    """Encodes data straight to a JSON response"""
+    return app.response_class(
+        orjson.dumps(data, default=DefaultJSONProvider.default),
+        status=status_code,
+        mimetype="application/json",
+        headers=headers,
+    )
+
+
+# version is unused in the body; it only makes each update a new cache key
+@lru_cache(maxsize=4096)
+def serialize_product(product_id: int, version: int) -> bytes:  # pylint: disable=unused-argument
+    """Returns the JSON encoding of a version of a Product
+
+    Every write draws a new random version, so a stale entry is never looked
+    up again, even when a new product reuses the id of a deleted one
+    """
+    product = Product.find(product_id)
+    if not product:
         abort(
-            status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
-            f"Content-Type must be {content_type}",
+            status.HTTP_404_NOT_FOUND,
+            f"Product not found for id: {product_id}"
         )
+    return orjson.dumps(product.serialize())
+
+
+def invalidate_product_lists():
+    """Retires every cached product list by starting a new generation
 
-    if request.headers["Content-Type"] == content_type:
+    Generations are random so one is never reused, even after the
+    generation key is evicted from the cache
+    """
+    generation = uuid4().hex
+    cache.set(PRODUCT_LIST_GENERATION_KEY, generation, timeout=0)
+    return generation
+
+
+def product_list_cache_key():
+    """Builds the cache key of a product list from its generation and query"""
+    generation = cache.get(PRODUCT_LIST_GENERATION_KEY) or invalidate_product_lists()
+    query = urlencode(sorted(request.args.items(multi=True)))
+    return f"product_list/{generation}/{md5(query.encode()).hexdigest()}"
+
+
+def stream_requested():
+    """Returns True when the client asked for a streamed response"""
+    return _BOOLEAN_BY_STRING.get(request.args.get("stream", "").lower(), False)
+
+
+def stream_json_rows(query, batch_size=500):
+    """Yields the rows of a query as chunks of a JSON array"""
+    rows = db.session.execute(query.execution_options(yield_per=batch_size)).mappings()
+    separator = b"["
+    for row in rows:
+        yield separator + orjson.dumps(dict(row), default=DefaultJSONProvider.default)
+        separator = b","
+    yield b"[]" if separator == b"[" else b"]"
+
+
+def check_content_type(content_type):
+    """Checks that the media type is correct"""
+    if request.mimetype == content_type:
         return
 
-    app.logger.error("Invalid Content-Type: %s", request.headers["Content-Type"])
+    logger.error("Invalid Content-Type: %s", request.mimetype or "(none)")
     abort(
         status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
         f"Content-Type must be {content_type}",
@@ -82,19 +153,49 @@ def create_products():
     Creates a Product
     This endpoint will create a Product based the data in the body that is posted
     """
-    app.logger.info("Request to Create a Product...")
+    logger.info("Request to Create a Product...")
     check_content_type("application/json")
 
     data = request.get_json()
-    app.logger.info("Processing: %s", data)
     product = Product()
     product.deserialize(data)
     product.create()
-    app.logger.info("Product with new id [%s] saved!", product.id)
+    invalidate_product_lists()
+    logger.info("Product with new id [%s] saved!", product.id)
 
     message = product.serialize()
     location_url = url_for("get_product", product_id=product.id, _external=True)
-    return jsonify(message), status.HTTP_201_CREATED, {"Location": location_url}
+    return json_response(message, status.HTTP_201_CREATED, {"Location": location_url})
+
+
+######################################################################
+# C R E A T E   P R O D U C T S   I N   B U L K
+######################################################################
+
+
+@app.route("/products/bulk", methods=["POST"])
+def create_products_bulk():
+    """
+    Creates many Products
+    This endpoint will create a Product for each item in the posted JSON array
+    and return the ids of the new Products
+    """
+    logger.info("Request to Create Products in bulk...")
+    check_content_type("application/json")
+
+    data = request.get_json()
+    if not isinstance(data, list):
+        abort(
+            status.HTTP_400_BAD_REQUEST,
+            "Request body must be a JSON array of products"
+        )
+
+    products = [Product().deserialize(item) for item in data]
+    product_ids = Product.bulk_create(products)
+    invalidate_product_lists()
+    logger.info("Products with new ids %s saved!", product_ids)
+
+    return json_response(product_ids, status.HTTP_201_CREATED)
 
 
 ######################################################################
@@ -103,48 +204,65 @@ def create_products():
 
 
 @app.route("/products", methods=['GET'])
+@cache.cached(make_cache_key=product_list_cache_key, unless=stream_requested)
 def get_products():
     """
     Gets products, filtered by query parametes if provided
     """
-    name = request.args.get("name")                 # Check for ?name=
-    category_str = request.args.get("category")     # Check for ?category=
-    available_str = request.args.get("available")     # Check for ?available=
+    args = request.args
+    name = args.get("name")                 # Check for ?name=
+    category_str = args.get("category")     # Check for ?category=
+    available_str = args.get("available")     # Check for ?available=
 
-    # Start with all products:
-    products = Product.all()
+    # Collect every filter first and apply them in a single WHERE clause
+    criteria = []
 
     if name:
         # Filter by Name:
-        products = [p for p in products if p.name == name]
+        criteria.append(Product.name == name)
 
     if category_str:
-        try:
-            # Filter by Category:
-            category = getattr(Category, category_str.upper())
-            products = [p for p in products if p.category == category]
-        except AttributeError:
+        # Filter by Category:
+        category = _CATEGORY_BY_NAME.get(category_str.upper())
+        if category is None:
             abort(
                 status.HTTP_400_BAD_REQUEST,
                 f"Invalid category: {category_str}"
             )
+        criteria.append(Product.category == category)
 
     if available_str:
         # Filter by Available:
-        available = None
-        if available_str.lower() in ('true', 't', '1', 'yes'):
-            available = True
-        elif available_str.lower() in ('false', 'f', '0', 'no'):
-            available = False
-        else:
+        available = _BOOLEAN_BY_STRING.get(available_str.lower())
+        if available is None:
             abort(
                 status.HTTP_400_BAD_REQUEST,
                 f"Invalid value for 'available': {available_str}"
             )
-        products = [p for p in products if p.available == available]
+        criteria.append(Product.available == available)
+
+    # Let the database render price and category as strings so every row
+    # is made of plain JSON types
+    query = db.select(
+        Product.id,
+        Product.name,
+        Product.description,
+        db.cast(Product.price, db.String).label("price"),
+        Product.available,
+        db.type_coerce(Product.category, db.String).label("category"),
+    ).where(*criteria)
+
+    if stream_requested():
+        # Send rows as they are fetched instead of building the whole list
+        return app.response_class(
+            stream_with_context(stream_json_rows(query)),
+            status=status.HTTP_200_OK,
+            mimetype="application/json",
+        )
 
-    product_list = [p.serialize() for p in products]
-    return jsonify(product_list), status.HTTP_200_OK
+    # Return plain rows rather than hydrating a Product for each one
+    product_list = [dict(row) for row in db.session.execute(query).mappings()]
+    return json_response(product_list, status.HTTP_200_OK)
 
 ######################################################################
 # R E A D   A   P R O D U C T
@@ -157,17 +275,30 @@ def get_product(product_id):
     Gets a Product by ID
     This endpoint will get a Product based on the ID provided in the URL
     """
-    app.logger.info("Request to Get a Product...")
+    logger.info("Request to Get a Product...")
 
-    found_product = Product.find(product_id)
-    if not found_product:
+    version = Product.find_version(product_id)
+    if version is None:
         abort(
             status.HTTP_404_NOT_FOUND,
             f"Product not found for id: {product_id}"
         )
 
-    message = found_product.serialize()
-    return jsonify(message), status.HTTP_200_OK
+    # Let clients revalidate with If-None-Match instead of refetching.
+    # Flask-Compress appends ":<algorithm>" to the ETag of a compressed body,
+    # so a client may send back any of those variants
+    etag = f"{product_id}-{version}"
+    variants = [etag] + [f"{etag}:{algorithm}" for algorithm in app.config["COMPRESS_ALGORITHM"]]
+    if any(request.if_none_match.contains_weak(variant) for variant in variants):
+        response = app.response_class(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        response = app.response_class(
+            serialize_product(product_id, version),
+            status=status.HTTP_200_OK,
+            mimetype="application/json",
+        )
+    response.set_etag(etag, weak=True)
+    return response
 
 ######################################################################
 # U P D A T E   A   P R O D U C T
@@ -180,22 +311,14 @@ def update_product(product_id):
     Updates a product with specified id
     This endpoint will update the specified product with newly provided values
     """
-    app.logger.info("Request to Update a Product...")
-
-    found_product = Product.find(product_id)
-    if not found_product:
-        abort(
-            status.HTTP_404_NOT_FOUND,
-            f"Product not found for id: {product_id}"
-        )
-
+    logger.info("Request to Update a Product...")
     check_content_type("application/json")
 
     data = request.get_json()
-    app.logger.info("Processing: %s", data)
 
+    product = Product()
     try:
-        found_product.deserialize(data)
+        product.deserialize(data)
     except AttributeError as error:
         abort(
             status.HTTP_400_BAD_REQUEST,
@@ -212,10 +335,16 @@ def update_product(product_id):
             error.message
         )
 
-    found_product.update()
+    product.id = product_id
+    if not product.replace():
+        abort(
+            status.HTTP_404_NOT_FOUND,
+            f"Product not found for id: {product_id}"
+        )
+    invalidate_product_lists()
 
-    message = found_product.serialize()
-    return jsonify(message), status.HTTP_200_OK
+    message = product.serialize()
+    return json_response(message, status.HTTP_200_OK)
 
 ######################################################################
 # D E L E T E   A   P R O D U C T
@@ -228,14 +357,13 @@ def delete_product(product_id):
     Deletes a product with specified id
     This endpoint will delete the specified product
     """
-    app.logger.info("Request to Update a Product...")
+    logger.info("Request to Delete a Product...")
 
-    found_product = Product.find(product_id)
-    if not found_product:
+    if not Product.delete_by_id(product_id):
         abort(
             status.HTTP_404_NOT_FOUND,
             f"Product not found for id: {product_id}"
         )
-
-    found_product.delete()
+    serialize_product.cache_clear()
+    invalidate_product_lists()
     return '', status.HTTP_204_NO_CONTENT
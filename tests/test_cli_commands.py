@@ -5,7 +5,7 @@ import os
 from unittest import TestCase
 from unittest.mock import patch, MagicMock
 from click.testing import CliRunner
-from service.common.cli_commands import db_create
+from service.common.cli_commands import db_create, db_upgrade
 
 
 class TestFlaskCLI(TestCase):
@@ -21,3 +21,11 @@ class TestFlaskCLI(TestCase):
         with patch.dict(os.environ, {"FLASK_APP": "service:app"}, clear=True):
             result = self.runner.invoke(db_create)
             self.assertEqual(result.exit_code, 0)
+
+    @patch('service.common.cli_commands.Product')
+    def test_db_upgrade(self, product_mock):
+        """It should call the db-upgrade command"""
+        with patch.dict(os.environ, {"FLASK_APP": "service:app"}, clear=True):
+            result = self.runner.invoke(db_upgrade)
+            self.assertEqual(result.exit_code, 0)
+            product_mock.upgrade_db.assert_called_once()
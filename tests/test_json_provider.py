@@ -0,0 +1,56 @@
+# Copyright 2016, 2023 John J. Rofrano. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Test cases for the orjson JSON Provider
+"""
+from decimal import Decimal
+from unittest import TestCase
+from service import app
+from service.common.json_provider import OrjsonProvider
+
+
+class TestOrjsonProvider(TestCase):
+    """Test the orjson JSON Provider"""
+
+    def setUp(self):
+        self.provider = OrjsonProvider(app)
+
+    def test_dumps_decimal(self):
+        """It should encode Decimal as a string"""
+        data = self.provider.dumps({"price": Decimal("12.50")})
+        self.assertEqual(self.provider.loads(data), {"price": "12.50"})
+
+    def test_loads_bytes(self):
+        """It should decode JSON from bytes"""
+        self.assertEqual(self.provider.loads(b'{"name": "Fedora"}'), {"name": "Fedora"})
+
+    def test_dumps_unsupported_type(self):
+        """It should raise TypeError for types it cannot encode"""
+        self.assertRaises(TypeError, self.provider.dumps, object())
+
+    def test_dumps_uses_default_override(self):
+        """It should encode through a subclass's default hook"""
+
+        class SetProvider(OrjsonProvider):
+            """Encodes sets as sorted lists"""
+
+            @staticmethod
+            def default(o):
+                if isinstance(o, set):
+                    return sorted(o)
+                return OrjsonProvider.default(o)
+
+        provider = SetProvider(app)
+        self.assertEqual(provider.loads(provider.dumps({"ids": {2, 1}})), {"ids": [1, 2]})
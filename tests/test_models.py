@@ -27,7 +27,7 @@ import os
 import logging
 import unittest
 from decimal import Decimal
-from service.models import Product, Category, db
+from service.models import Product, Category, DataValidationError, db, new_version
 from service import app
 from tests.factories import ProductFactory
 
@@ -138,6 +138,47 @@ class TestProductModel(unittest.TestCase):
         self.assertEqual(updated_product.id, product.id)
         self.assertEqual(updated_product.description, new_desc)
 
+    def test_replace_product(self):
+        """It should replace a product in the database with one UPDATE"""
+        product = ProductFactory()
+        product.id = None
+        product.create()
+
+        old_version = product.version
+        replacement = ProductFactory()
+        replacement.id = product.id
+        self.assertTrue(replacement.replace())
+        self.assertNotEqual(replacement.version, old_version)
+        self.assertEqual(Product.find_version(product.id), replacement.version)
+
+        found = Product.find(product.id)
+        self.assertEqual(found.name, replacement.name)
+        self.assertEqual(found.description, replacement.description)
+        self.assertEqual(found.price, replacement.price)
+        self.assertEqual(found.available, replacement.available)
+        self.assertEqual(found.category, replacement.category)
+
+    def test_replace_unknown_product(self):
+        """It should not replace a product that does not exist"""
+        product = ProductFactory()
+        product.id = 5000
+        self.assertFalse(product.replace())
+
+    def test_replace_product_without_id(self):
+        """It should not replace a product with no id"""
+        product = ProductFactory()
+        product.id = None
+        self.assertRaises(DataValidationError, product.replace)
+
+    def test_delete_product_by_id(self):
+        """It should remove a product from the database by its id"""
+        product = ProductFactory()
+        product.id = None
+        product.create()
+        self.assertTrue(Product.delete_by_id(product.id))
+        self.assertEqual(len(Product.all()), 0)
+        self.assertFalse(Product.delete_by_id(product.id))
+
     def test_delete_product(self):
         """It should remove a product from the database"""
         product = ProductFactory()
@@ -150,6 +191,14 @@ class TestProductModel(unittest.TestCase):
         products = Product.all()
         self.assertEqual(len(products), 0)
 
+    def test_bulk_create_products(self):
+        """It should create many products in one transaction"""
+        products = ProductFactory.build_batch(5)
+        product_ids = Product.bulk_create(products)
+        self.assertEqual(len(product_ids), 5)
+        self.assertEqual(product_ids, [p.id for p in products])
+        self.assertEqual(len(Product.all()), 5)
+
     def test_list_all_products(self):
         """It should list all products in the database"""
         products = Product.all()
@@ -163,6 +212,34 @@ class TestProductModel(unittest.TestCase):
         products = Product.all()
         self.assertEqual(len(products), 5)
 
+    def test_find_product_version(self):
+        """It should find the version of a product by its id"""
+        product = ProductFactory()
+        product.id = None
+        product.create()
+        created_version = Product.find_version(product.id)
+        self.assertEqual(created_version, product.version)
+        product.update()
+        self.assertNotEqual(Product.find_version(product.id), created_version)
+        self.assertEqual(Product.find_version(product.id), product.version)
+        self.assertIsNone(Product.find_version(product.id + 1000))
+
+    def test_new_version_fits_integer_column(self):
+        """It should draw versions that fit in a signed 32-bit INTEGER"""
+        for _ in range(100):
+            self.assertTrue(0 <= new_version() < 2 ** 31)
+
+    def test_upgrade_db_adds_version_column(self):
+        """It should add the version column to a table that predates it"""
+        db.session.execute(db.text("ALTER TABLE product DROP COLUMN version"))
+        db.session.commit()
+        Product.upgrade_db()
+
+        product = ProductFactory()
+        product.id = None
+        product.create()
+        self.assertEqual(Product.find_version(product.id), product.version)
+
     def test_search_for_product_by_name(self):
         """It should search for a product by name"""
         for _ in range(5):
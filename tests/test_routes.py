@@ -25,12 +25,15 @@ Test cases can be run with the following:
     nosetests --stop tests/test_service.py:TestProductService
 """
 import os
+import gzip
+import json
 import logging
 from decimal import Decimal
 from unittest import TestCase
 from urllib.parse import quote_plus
-from service import app
+from service import app, cache
 from service.common import status
+from service.routes import serialize_product
 from service.models import db, init_db, Product, Category
 from tests.factories import ProductFactory
 
@@ -72,6 +75,8 @@ class TestProductRoutes(TestCase):
         self.client = app.test_client()
         db.session.query(Product).delete()  # clean up the last tests
         db.session.commit()
+        cache.clear()
+        serialize_product.cache_clear()
 
     def tearDown(self):
         db.session.remove()
@@ -155,11 +160,50 @@ class TestProductRoutes(TestCase):
         response = self.client.post(BASE_URL, data="bad data")
         self.assertEqual(response.status_code, status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
 
+    def test_create_product_content_type_with_charset(self):
+        """It should Create a Product when the Content-Type has a charset"""
+        test_product = ProductFactory()
+        response = self.client.post(
+            BASE_URL,
+            json=test_product.serialize(),
+            content_type="application/json; charset=utf-8",
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
     def test_create_product_wrong_content_type(self):
         """It should not Create a Product with wrong Content-Type"""
         response = self.client.post(BASE_URL, data={}, content_type="plain/text")
         self.assertEqual(response.status_code, status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
 
+    def test_create_products_in_bulk(self):
+        """It should Create many Products in one request"""
+        test_products = ProductFactory.build_batch(5)
+        payload = [p.serialize() for p in test_products]
+        response = self.client.post(f"{BASE_URL}/bulk", json=payload)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        product_ids = response.get_json()
+        self.assertEqual(len(product_ids), 5)
+        for product_id, test_product in zip(product_ids, test_products):
+            found = Product.find(product_id)
+            self.assertEqual(found.name, test_product.name)
+            self.assertEqual(found.category, test_product.category)
+        self.assertEqual(self.get_product_count(), 5)
+
+    def test_create_products_in_bulk_not_a_list(self):
+        """It should not Create Products in bulk from a single object"""
+        payload = ProductFactory().serialize()
+        response = self.client.post(f"{BASE_URL}/bulk", json=payload)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_create_products_in_bulk_bad_product(self):
+        """It should not Create any Products in bulk when one is invalid"""
+        payload = [p.serialize() for p in ProductFactory.build_batch(2)]
+        del payload[1]["name"]
+        response = self.client.post(f"{BASE_URL}/bulk", json=payload)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.get_product_count(), 0)
+
     # ----------------------------------------------------------
     # TEST GET
     # ----------------------------------------------------------
@@ -172,6 +216,66 @@ class TestProductRoutes(TestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.json, test_product.serialize())
 
+    def test_get_product_not_modified(self):
+        """ Should return not modified when the client copy is current """
+        test_product = self._create_products()[0]
+        url = f"{BASE_URL}/{test_product.id}"
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response.headers.get("ETag")
+        self.assertIsNotNone(etag)
+
+        response = self.client.get(url, headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.data, b"")
+
+        # An update must produce a new ETag
+        test_product.name = "Renamed"
+        response = self.client.put(url, json=test_product.serialize())
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.get(url, headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response.headers.get("ETag"), etag)
+        self.assertEqual(response.json["name"], "Renamed")
+
+    def test_get_product_not_modified_compressed(self):
+        """ Should return not modified for the ETag of a compressed product """
+        min_size = app.config["COMPRESS_MIN_SIZE"]
+        app.config["COMPRESS_MIN_SIZE"] = 0  # one product is below the default
+        self.addCleanup(app.config.__setitem__, "COMPRESS_MIN_SIZE", min_size)
+        test_product = self._create_products()[0]
+        url = f"{BASE_URL}/{test_product.id}"
+        response = self.client.get(url, headers={"Accept-Encoding": "gzip"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.headers.get("Content-Encoding"), "gzip")
+        etag = response.headers.get("ETag")
+        self.assertTrue(etag.endswith(':gzip"'))
+
+        response = self.client.get(
+            url, headers={"Accept-Encoding": "gzip", "If-None-Match": etag}
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_get_product_after_id_reused(self):
+        """ Should not serve a deleted product to one that reuses its id """
+        test_product = self._create_products()[0]
+        url = f"{BASE_URL}/{test_product.id}"
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response.headers.get("ETag")
+
+        # Put a different product in the same row id
+        Product.delete_by_id(test_product.id)
+        new_product = ProductFactory()
+        new_product.id = test_product.id
+        db.session.add(new_product)
+        db.session.commit()
+
+        response = self.client.get(url, headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json["name"], new_product.name)
+        self.assertNotEqual(response.headers.get("ETag"), etag)
+
     def test_get_product_not_found(self):
         """ Should return not found for unknown product """
         url = f"{BASE_URL}/{5000}"
@@ -196,6 +300,13 @@ class TestProductRoutes(TestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(payload, response.json)
 
+    def test_update_unknown_product(self):
+        """ Should return not found when updating an unknown product """
+        payload = ProductFactory().serialize()
+        url = f"{BASE_URL}/{5000}"
+        response = self.client.put(url, json=payload)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
     def test_update_product_no_data(self):
         """ Should return bad request when missing all data """
         test_product = self._create_products()[0]
@@ -255,6 +366,56 @@ class TestProductRoutes(TestCase):
         self.assertIsInstance(data, list)
         self.assertEqual(len(data), 10)
 
+    def test_list_all_products_serialized(self):
+        """ Should list products in the same form as a single product """
+        products = self._create_products(3)
+
+        response = self.client.get(BASE_URL)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        data = sorted(response.json, key=lambda p: p["id"])
+        self.assertEqual(data, [p.serialize() for p in products])
+
+    def test_list_all_products_streamed(self):
+        """ Should stream all products when asked to """
+        products = self._create_products(5)
+
+        response = self.client.get(f"{BASE_URL}?stream=true")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.is_streamed)
+
+        data = sorted(response.json, key=lambda p: p["id"])
+        self.assertEqual(data, [p.serialize() for p in products])
+
+    def test_list_no_products_streamed(self):
+        """ Should stream an empty list when there are no products """
+        response = self.client.get(f"{BASE_URL}?stream=true")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json, [])
+
+    def test_list_all_products_after_create(self):
+        """ Should not serve a stale product list after a create """
+        self._create_products(2)
+        self.assertEqual(self.get_product_count(), 2)
+        self._create_products(1)
+        self.assertEqual(self.get_product_count(), 3)
+
+    def test_list_all_products_compressed(self):
+        """ Should compress a large product list when the client accepts it """
+        self._create_products(20)
+        response = self.client.get(BASE_URL, headers={"Accept-Encoding": "gzip"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.headers.get("Content-Encoding"), "gzip")
+
+        data = json.loads(gzip.decompress(response.data))
+        self.assertEqual(len(data), 20)
+
+    def test_create_keeps_other_cache_entries(self):
+        """ Should only retire cached product lists on a write """
+        cache.set("unrelated", "kept")
+        self._create_products(1)
+        self.assertEqual(cache.get("unrelated"), "kept")
+
     def test_list_products_by_name(self):
         """ Should search by product name """
         products = self._create_products(10)
@@ -316,6 +477,25 @@ class TestProductRoutes(TestCase):
         self.assertIsInstance(data, list)
         self.assertEqual(len(data), available_count)
 
+    def test_list_products_by_category_and_availability(self):
+        """ Should search by product category and availability together """
+        products = self._create_products(10)
+        search_category = products[0].category
+        search_available = products[0].available
+        match_count = sum(
+            p.category == search_category and p.available == search_available for p in products
+        )
+
+        url = f"{BASE_URL}?category={search_category.name}&available={search_available}"
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        data = response.json
+        self.assertEqual(len(data), match_count)
+        for product in data:
+            self.assertEqual(product["category"], search_category.name)
+            self.assertEqual(product["available"], search_available)
+
     def test_list_products_by_availability_invalid(self):
         """ Should return bad request with invalid available param """
         self._create_products(10)